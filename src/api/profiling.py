@@ -0,0 +1,172 @@
+# src/api/profiling.py
+"""
+Outils de profilage des transformations
+
+- StageTimer : mesure la durée de chaque étape (parse_hl7, hl7_to_fhir, encodage)
+- SlowMessageBuffer : conserve les N messages les plus lents de la dernière période, sans données patient
+- profile_call : exécute une fonction sous cProfile et renvoie un résumé pstats
+"""
+
+from typing import Dict, Any, List, Callable, Tuple
+from contextlib import contextmanager
+from datetime import datetime
+import cProfile
+import hashlib
+import heapq
+import hmac
+import io
+import itertools
+import pstats
+import re
+import secrets
+import threading
+import time
+
+# Motifs autorisés dans le résumé : tout le reste est remplacé par REDACTED
+SEGMENT_ID = re.compile(r'[A-Z][A-Z0-9]{2}')
+MESSAGE_TYPE = re.compile(r'[A-Z][A-Z0-9]{2}(\^[A-Z0-9_]{1,7}){0,2}')
+SENDER_ID = re.compile(r'[A-Za-z][A-Za-z0-9_.\-]{0,29}')
+REDACTED = "?"
+
+# Sel propre au processus : l'empreinte de MSH-10 permet de corréler les messages
+# sans exposer l'ID de contrôle (qui peut contenir un IPP ou un NIR)
+_HASH_KEY = secrets.token_bytes(16)
+
+
+class StageTimer:
+    """Chronomètre les étapes successives d'une transformation"""
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter):
+        self.stages: Dict[str, float] = {}
+        self._clock = clock
+        self._start = clock()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mesure la durée (ms) du bloc sous le nom `name`"""
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.stages[name] = (self._clock() - start) * 1000
+
+    @property
+    def total_ms(self) -> float:
+        """Durée écoulée (ms) depuis la création du chronomètre"""
+        return (self._clock() - self._start) * 1000
+
+
+def _allowed(value: str, pattern: re.Pattern) -> str:
+    """Renvoie `value` si elle respecte `pattern`, REDACTED sinon"""
+    return value if pattern.fullmatch(value) else REDACTED
+
+
+def _digest(value: str) -> str:
+    """Empreinte courte et salée d'une valeur, pour corrélation uniquement"""
+    return hmac.new(_HASH_KEY, value.encode(), hashlib.sha256).hexdigest()[:12]
+
+
+def redact_hl7(message: str) -> Dict[str, Any]:
+    """
+    Résumé structurel d'un message HL7 sans données patient (PHI)
+    Seuls l'émetteur (MSH-3/MSH-4), le type de message et la forme des segments sont
+    conservés, et uniquement s'ils respectent un format strict (sinon REDACTED).
+    L'ID de contrôle (MSH-10) n'est exposé que sous forme d'empreinte salée.
+    """
+    segments = [seg.strip() for seg in re.split(r'[\r\n]+', message) if seg.strip()]
+    summary = {
+        "size": len(message),
+        "segments": [f"{_allowed(seg.split('|')[0], SEGMENT_ID)}[{seg.count('|')}]" for seg in segments],
+        "sending_application": None,
+        "sending_facility": None,
+        "message_type": None,
+        "message_id_hash": None
+    }
+    if segments and segments[0].startswith('MSH'):
+        # MSH-1 est le séparateur : MSH-n est à l'index n - 1
+        msh = segments[0].split('|')
+        if len(msh) > 3:
+            summary["sending_application"] = _allowed(msh[2].split('^')[0], SENDER_ID)
+            summary["sending_facility"] = _allowed(msh[3].split('^')[0], SENDER_ID)
+        if len(msh) > 8:
+            summary["message_type"] = _allowed(msh[8], MESSAGE_TYPE)
+        if len(msh) > 9 and msh[9]:
+            summary["message_id_hash"] = _digest(msh[9])
+    return summary
+
+
+class SlowMessageBuffer:
+    """
+    Conserve les `capacity` messages les plus lents des `max_age` dernières secondes
+    Tas min borné : l'insertion coûte O(log capacity), utilisable en production.
+    Les entrées plus anciennes que `max_age` sont évincées pour laisser la place
+    aux lenteurs récentes (max_age <= 0 : pas d'expiration).
+    """
+
+    def __init__(self, capacity: int = 20, max_age: float = 3600,
+                 clock: Callable[[], float] = time.monotonic):
+        self.capacity = capacity
+        self.max_age = max_age
+        self._clock = clock
+        # (durée, horodatage, compteur, entrée)
+        self._heap: List[Tuple[float, float, int, Dict[str, Any]]] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        """Retire les entrées trop anciennes (appelé sous verrou)"""
+        if self.max_age <= 0:
+            return
+        kept = [item for item in self._heap if now - item[1] <= self.max_age]
+        if len(kept) != len(self._heap):
+            heapq.heapify(kept)
+            self._heap = kept
+
+    def record(self, message: str, timer: StageTimer, status: str = "success") -> None:
+        """Enregistre un message si il fait partie des plus lents"""
+        if self.capacity <= 0:
+            return
+        total_ms = timer.total_ms
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            if len(self._heap) >= self.capacity and total_ms <= self._heap[0][0]:
+                return
+        # Résumé construit hors verrou, uniquement pour les messages retenus
+        entry = {
+            "total_ms": round(total_ms, 3),
+            "stages_ms": {name: round(ms, 3) for name, ms in timer.stages.items()},
+            "status": status,
+            "recorded_at": datetime.utcnow().isoformat(),
+            "message": redact_hl7(message)
+        }
+        item = (total_ms, now, next(self._counter), entry)
+        with self._lock:
+            if len(self._heap) < self.capacity:
+                heapq.heappush(self._heap, item)
+            elif total_ms > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Messages retenus, du plus lent au plus rapide"""
+        with self._lock:
+            self._expire(self._clock())
+            items = sorted(self._heap, reverse=True)
+        return [entry for _, _, _, entry in items]
+
+    def clear(self) -> None:
+        """Vide la liste des messages retenus"""
+        with self._lock:
+            self._heap.clear()
+
+
+def profile_call(func: Callable[..., Any], *args, limit: int = 25, **kwargs) -> Tuple[Any, str]:
+    """Exécute `func` sous cProfile et renvoie (résultat, résumé pstats)"""
+    profiler = cProfile.Profile()
+    try:
+        result = profiler.runcall(func, *args, **kwargs)
+    finally:
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return result, stream.getvalue()
@@ -1,7 +1,9 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Response
 from .models import MessageRequest, TransformationResponse
+from .profiling import StageTimer, SlowMessageBuffer, profile_call
+from ..gateway.config import GatewayConfig
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import hl7
 import logging
 
@@ -15,6 +17,9 @@ app = FastAPI(
     version="1.0.0"
 )
 
+config = GatewayConfig()
+slow_messages = SlowMessageBuffer(config.SLOW_MESSAGES_CAPACITY, config.SLOW_MESSAGES_MAX_AGE)
+
 def format_datetime(dt_string: str) -> str:
     """
     Convertit une date/heure HL7 en format ISO8601
@@ -234,25 +239,70 @@ def hl7_to_fhir(parsed_hl7: Dict[str, Any]) -> Dict[str, Any]:
 
     return fhir_resource
 
+def convert_hl7(message: str, timer: StageTimer) -> Dict[str, Any]:
+    """Parse et convertit un message HL7 en chronométrant chaque étape"""
+    with timer.stage("parse_hl7"):
+        parsed_hl7 = parse_hl7(message)
+    with timer.stage("hl7_to_fhir"):
+        fhir_result = hl7_to_fhir(parsed_hl7)
+
+    return {
+        "status": "success",
+        "data": fhir_result,
+        "metadata": {
+            "source_format": "HL7",
+            "target_format": "FHIR",
+            "timestamp": datetime.utcnow().isoformat(),
+            "parsed_segments": list(parsed_hl7.keys())
+        }
+    }
+
+def encode_response(result: Dict[str, Any]) -> str:
+    """Sérialise la réponse de transformation en JSON"""
+    return TransformationResponse(**result).json()
+
+def process_hl7(message: str, timer: StageTimer) -> Tuple[Dict[str, Any], str]:
+    """Transforme un message HL7 et encode la réponse, étape par étape"""
+    result = convert_hl7(message, timer)
+    with timer.stage("encode"):
+        body = encode_response(result)
+    return result, body
+
+def is_flag_set(value: Optional[str]) -> bool:
+    """Interprète un drapeau 1/true/yes (insensible à la casse), toute autre valeur est ignorée"""
+    return (value or "").strip().lower() in ("1", "true", "yes")
+
 @app.post("/transform", response_model=TransformationResponse)
-async def transform_message(request: MessageRequest):
+async def transform_message(
+    request: MessageRequest,
+    profile: Optional[str] = Query(None, description="1, true ou yes : retourne un résumé cProfile (si le profilage est activé)"),
+    x_profile: Optional[str] = Header(None, description="1, true ou yes (insensible à la casse)")
+):
     """Endpoint de transformation de messages"""
     try:
         if request.source_format == "HL7" and request.target_format == "FHIR":
             if isinstance(request.message, str):
-                parsed_hl7 = parse_hl7(request.message)
-                fhir_result = hl7_to_fhir(parsed_hl7)
-                
-                return {
-                    "status": "success",
-                    "data": fhir_result,
-                    "metadata": {
-                        "source_format": "HL7",
-                        "target_format": "FHIR",
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "parsed_segments": list(parsed_hl7.keys())
-                    }
-                }
+                timer = StageTimer()
+                profiled = config.PROFILING_ENABLED and (is_flag_set(profile) or is_flag_set(x_profile))
+                # cProfile fausse les durées : les requêtes profilées ne sont pas retenues
+                recorded = config.ADMIN_ENABLED and not profiled
+                try:
+                    if profiled:
+                        # Le profil couvre l'encodage de la réponse sans le résumé,
+                        # puis la réponse est ré-encodée avec metadata.profile
+                        (result, _), summary = profile_call(process_hl7, request.message, timer)
+                        result["metadata"]["profile"] = summary
+                        body = encode_response(result)
+                    else:
+                        _, body = process_hl7(request.message, timer)
+                except Exception:
+                    if recorded:
+                        slow_messages.record(request.message, timer, status="error")
+                    raise
+
+                if recorded:
+                    slow_messages.record(request.message, timer)
+                return Response(content=body, media_type="application/json")
             else:
                 raise ValueError("HL7 message must be a string")
         
@@ -263,6 +313,28 @@ async def transform_message(request: MessageRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def require_admin():
+    """Les endpoints /admin n'existent que si GATEWAY_ADMIN_ENABLED est activé"""
+    if not config.ADMIN_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+@app.get("/admin/slow-messages")
+async def get_slow_messages():
+    """Messages les plus lents avec le détail des étapes (sans données patient)"""
+    require_admin()
+    return {
+        "capacity": slow_messages.capacity,
+        "max_age": slow_messages.max_age,
+        "messages": slow_messages.snapshot()
+    }
+
+@app.delete("/admin/slow-messages")
+async def clear_slow_messages():
+    """Réinitialise la liste des messages les plus lents"""
+    require_admin()
+    slow_messages.clear()
+    return {"status": "cleared"}
+
 @app.get("/health")
 async def health_check():
     """Endpoint de contrôle de santé"""
@@ -25,5 +25,14 @@ class GatewayConfig(BaseSettings):
         }
     }
 
+    # Profilage : résumé cProfile à la demande (?profile=true ou X-Profile: 1)
+    PROFILING_ENABLED: bool = False
+    # Endpoints /admin (messages les plus lents) : désactivés par défaut
+    ADMIN_ENABLED: bool = False
+    # Nombre de messages les plus lents conservés pour /admin/slow-messages
+    SLOW_MESSAGES_CAPACITY: int = 20
+    # Durée (secondes) pendant laquelle un message lent reste visible, 0 = illimitée
+    SLOW_MESSAGES_MAX_AGE: int = 3600
+
     class Config:
         env_prefix = "GATEWAY_"
@@ -0,0 +1,94 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from src.api import routes
+
+HL7_MESSAGE = "\n".join([
+    "MSH|^~\\&|LABO|HOPITAL|SIH|HOPITAL|202403191030||SIU^S12^SIU_S12|20230319103025|P|2.5.1",
+    "SCH|12345|28456|||BIOCHEM^Biochemistry^L||||1^once^D|60^minutes|^^60^202403201030|||||||||1234^DUPONT^JEAN^^^^^MD|||||BIOCHEM^Biochemistry Department^L|123 Main St^^Paris^^75001^FRA||||BOOKED",
+    "PID|1||IPP123456^^^HOPITAL^PI||DUPONT^JEAN^MARC^^^^L||19800515|M",
+    "AIG|1|||Auxiliaires^Auxiliaires",
+    "AIL|1||Bureau11^Bureau 11"
+])
+
+client = TestClient(routes.app)
+
+
+def transform(message, params=None, headers=None):
+    payload = {"message": message, "source_format": "HL7", "target_format": "FHIR"}
+    return client.post("/transform", json=payload, params=params, headers=headers)
+
+
+@pytest.fixture(autouse=True)
+def admin_enabled(monkeypatch):
+    monkeypatch.setattr(routes.config, "ADMIN_ENABLED", True)
+    routes.slow_messages.clear()
+    yield
+    routes.slow_messages.clear()
+
+
+def test_profile_ignored_when_disabled(monkeypatch):
+    monkeypatch.setattr(routes.config, "PROFILING_ENABLED", False)
+
+    response = transform(HL7_MESSAGE, params={"profile": "true"})
+
+    assert response.status_code == 200
+    assert "profile" not in response.json()["metadata"]
+
+
+def test_profile_returned_when_enabled(monkeypatch):
+    monkeypatch.setattr(routes.config, "PROFILING_ENABLED", True)
+
+    response = transform(HL7_MESSAGE, headers={"X-Profile": "True"})
+
+    assert response.status_code == 200
+    summary = response.json()["metadata"]["profile"]
+    assert "convert_hl7" in summary
+    assert "encode_response" in summary
+    assert routes.slow_messages.snapshot() == []
+
+
+def test_unrecognized_profile_flag_ignored(monkeypatch):
+    monkeypatch.setattr(routes.config, "PROFILING_ENABLED", True)
+
+    for params, headers in (({"profile": "foo"}, None), (None, {"X-Profile": "foo"})):
+        response = transform(HL7_MESSAGE, params=params, headers=headers)
+        assert response.status_code == 200
+        assert "profile" not in response.json()["metadata"]
+
+
+def test_stage_timings_recorded():
+    response = transform(HL7_MESSAGE)
+    assert response.status_code == 200
+
+    entries = client.get("/admin/slow-messages").json()["messages"]
+    assert len(entries) == 1
+    assert entries[0]["status"] == "success"
+    assert set(entries[0]["stages_ms"]) == {"parse_hl7", "hl7_to_fhir", "encode"}
+    assert "DUPONT" not in str(entries)
+
+
+def test_failed_parse_recorded_as_error():
+    response = transform("DUPONT JEAN 19800101 NIR 1800175123456")
+    assert response.status_code == 400
+
+    entries = client.get("/admin/slow-messages").json()["messages"]
+    assert len(entries) == 1
+    assert entries[0]["status"] == "error"
+    assert "DUPONT" not in str(entries)
+
+
+def test_admin_disabled(monkeypatch):
+    monkeypatch.setattr(routes.config, "ADMIN_ENABLED", False)
+
+    assert transform(HL7_MESSAGE).status_code == 200
+    assert routes.slow_messages.snapshot() == []
+    assert client.get("/admin/slow-messages").status_code == 404
+    assert client.delete("/admin/slow-messages").status_code == 404
+
+
+def test_admin_reset():
+    transform(HL7_MESSAGE)
+
+    assert client.delete("/admin/slow-messages").status_code == 200
+    assert client.get("/admin/slow-messages").json()["messages"] == []
@@ -0,0 +1,109 @@
+from src.api.profiling import StageTimer, SlowMessageBuffer, redact_hl7
+
+HL7_MESSAGE = "\n".join([
+    "MSH|^~\\&|LABO|HOPITAL|SIH|HOPITAL|202403191030||SIU^S12^SIU_S12|20230319103025|P|2.5.1",
+    "PID|1||IPP123456^^^HOPITAL^PI||DUPONT^JEAN^MARC^^^^L||19800515|M",
+    "AIL|1||Bureau11^Bureau 11"
+])
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_timer(duration_ms: float) -> StageTimer:
+    clock = FakeClock()
+    timer = StageTimer(clock=clock)
+    clock.now = duration_ms / 1000
+    return timer
+
+
+def test_stage_timer_uses_clock():
+    clock = FakeClock()
+    timer = StageTimer(clock=clock)
+    with timer.stage("parse_hl7"):
+        clock.now = 0.002
+    clock.now = 0.005
+
+    assert round(timer.stages["parse_hl7"], 6) == 2
+    assert round(timer.total_ms, 6) == 5
+
+
+def test_buffer_keeps_slowest_within_capacity():
+    buffer = SlowMessageBuffer(capacity=2)
+    for duration in (10, 30, 20, 5):
+        buffer.record(HL7_MESSAGE, make_timer(duration))
+
+    assert [entry["total_ms"] for entry in buffer.snapshot()] == [30, 20]
+
+
+def test_buffer_snapshot_slowest_first():
+    buffer = SlowMessageBuffer(capacity=5)
+    for duration in (10, 50, 30):
+        buffer.record(HL7_MESSAGE, make_timer(duration))
+
+    assert [entry["total_ms"] for entry in buffer.snapshot()] == [50, 30, 10]
+
+
+def test_buffer_zero_capacity_is_noop():
+    buffer = SlowMessageBuffer(capacity=0)
+    buffer.record(HL7_MESSAGE, make_timer(100))
+    assert buffer.snapshot() == []
+
+
+def test_buffer_clear():
+    buffer = SlowMessageBuffer(capacity=2)
+    buffer.record(HL7_MESSAGE, make_timer(10))
+    buffer.clear()
+    assert buffer.snapshot() == []
+
+
+def test_buffer_evicts_old_entries():
+    clock = FakeClock()
+    buffer = SlowMessageBuffer(capacity=2, max_age=60, clock=clock)
+    buffer.record(HL7_MESSAGE, make_timer(500))
+    buffer.record(HL7_MESSAGE, make_timer(400))
+
+    clock.now = 120
+    buffer.record(HL7_MESSAGE, make_timer(10))
+
+    assert [entry["total_ms"] for entry in buffer.snapshot()] == [10]
+
+
+def test_redact_hl7_keeps_structure_only():
+    summary = redact_hl7(HL7_MESSAGE)
+
+    assert summary["segments"] == ["MSH[11]", "PID[8]", "AIL[3]"]
+    assert summary["sending_application"] == "LABO"
+    assert summary["sending_facility"] == "HOPITAL"
+    assert summary["message_type"] == "SIU^S12^SIU_S12"
+    assert len(summary["message_id_hash"]) == 12
+    for value in ("DUPONT", "JEAN", "IPP123456", "19800515", "Bureau", "20230319103025"):
+        assert value not in str(summary)
+
+
+def test_redact_hl7_message_id_hash_is_stable():
+    assert redact_hl7(HL7_MESSAGE)["message_id_hash"] == redact_hl7(HL7_MESSAGE)["message_id_hash"]
+
+
+def test_redact_hl7_malformed_line():
+    summary = redact_hl7("DUPONT JEAN 19800101 NIR 1800175123456")
+
+    assert summary["segments"] == ["?[0]"]
+    assert "DUPONT" not in str(summary)
+    assert "1800175123456" not in str(summary)
+
+
+def test_redact_hl7_malformed_msh_fields():
+    message = "MSH|^~\\&|1800175123456|HOPITAL|C|D|2024||DUPONT^JEAN|1800175123456|P"
+    summary = redact_hl7(message)
+
+    assert summary["sending_application"] == "?"
+    assert summary["sending_facility"] == "HOPITAL"
+    assert summary["message_type"] == "?"
+    assert "1800175123456" not in str(summary)
+    assert "DUPONT" not in str(summary)